@@ -1,35 +1,117 @@
-import datetime, time, secrets, os
+import datetime, time, os, gzip, hashlib
+import click
 from pytz import timezone
 
-from flask import Flask, redirect, url_for, request, render_template, session, redirect, Response
+from flask import Flask, Blueprint, redirect, url_for, request, render_template, session, redirect, Response, g, current_app, abort
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 from werkzeug.security import check_password_hash
-from config import PASSWORD_HASH
-from config import SECRET_KEY
-from flask_migrate import Migrate
+from coalescer import WriteCoalescer
 
-app = Flask(__name__)
-app.secret_key = SECRET_KEY
+# keep module level imports light: importing this file should cost no more than defining
+# the models and routes. config, alembic and the schema are only touched when asked for
 basedir = os.path.abspath(os.path.dirname(__file__))
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(basedir, 'backend.db')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
-db = SQLAlchemy(app)
-migrate = Migrate(app, db)
-TZ = timezone('EST')
+db = SQLAlchemy()
+coalescer = WriteCoalescer()
+bp = Blueprint("todo", __name__, cli_group=None)
+
+# due dates outside this range are typos, not plans
+MIN_DUE_YEAR, MAX_DUE_YEAR = 1970, 2999
+
+def create_app(migrations=True):
+    """Build the app. Touches no tables, so every worker process can call it safely.
+    Servers pass migrations=False to skip importing alembic, which only `flask db` needs"""
+    import config
+
+    app = Flask(__name__)
+    app.secret_key = config.SECRET_KEY
+    app.config['PASSWORD_HASH'] = config.PASSWORD_HASH
+    app.config['DATABASE_PATH'] = os.path.join(basedir, 'backend.db')
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + app.config['DATABASE_PATH']
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # wait on another worker's write lock instead of failing straight away
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'connect_args': {'timeout': 15}}
+    # how long blur-driven saves are buffered before being written together, 0 writes straight away.
+    # buffers are per process, so a render on another worker can miss a save for up to this long.
+    # gunicorn.conf.py turns this off when running more than one worker
+    app.config['WRITE_COALESCE_SECONDS'] = getattr(config, 'WRITE_COALESCE_SECONDS', 0.5)
+    # online snapshots, see snapshots.py. an interval of 0 leaves the background thread off
+    app.config['SNAPSHOT_DIR'] = getattr(config, 'SNAPSHOT_DIR', os.path.join(basedir, 'snapshots'))
+    app.config['SNAPSHOT_INTERVAL_SECONDS'] = getattr(config, 'SNAPSHOT_INTERVAL_SECONDS', 0)
+    app.config['SNAPSHOT_KEEP'] = getattr(config, 'SNAPSHOT_KEEP', 7)
+    app.config['SNAPSHOT_PAGES_PER_STEP'] = getattr(config, 'SNAPSHOT_PAGES_PER_STEP', 128)
+    # responses smaller than this aren't worth compressing
+    app.config['COMPRESS_MIN_SIZE'] = getattr(config, 'COMPRESS_MIN_SIZE', 500)
+    # zone dates are entered and shown in, any tz database name. they're stored in UTC either way
+    app.config['TIMEZONE'] = timezone(getattr(config, 'TIMEZONE', 'EST'))
+
+    db.init_app(app)
+    coalescer.init_app(app, write_task_fields)
+    app.register_blueprint(bp)
+
+    if migrations:
+        from flask_migrate import Migrate
+        Migrate(app, db)
 
-@app.after_request
-def suffixes(response):
-    if session.get("authenticated"):
-        state = AppState.query.first()
-        if not state:
-            state = AppState()
-            db.session.add(state)
-        state.last_checked_in = datetime.datetime.now(TZ)
-        db.session.commit()
-        print(f"last_checked_in on: {state.last_checked_in.strftime('%A').lower()}")
-    return response
+    with app.app_context():
+        event.listen(db.engine, "connect", set_sqlite_pragmas)
+
+    return app
+
+def start_snapshot_thread(app):
+    """Start periodic snapshots in this process if configured. Call after forking, never before"""
+    if not app.config['SNAPSHOT_INTERVAL_SECONDS']:
+        return None
+    from snapshots import SnapshotThread
+
+    thread = SnapshotThread(
+        app.config['DATABASE_PATH'],
+        app.config['SNAPSHOT_DIR'],
+        app.config['SNAPSHOT_INTERVAL_SECONDS'],
+        pages=app.config['SNAPSHOT_PAGES_PER_STEP'],
+        keep=app.config['SNAPSHOT_KEEP'],
+        logger=app.logger)
+    thread.start()
+    return thread
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Runs on every new connection, so each worker process sets up its own"""
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers in every worker carry on while one of them writes
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+def local_zone():
+    return current_app.config['TIMEZONE']
+
+def local_now():
+    return datetime.datetime.now(local_zone())
+
+def local_midnight(date):
+    return local_zone().localize(datetime.datetime.combine(date, datetime.time()))
+
+class ZonedDateTime(db.TypeDecorator):
+    """A timezone aware datetime, stored as naive UTC so the text sorts (and range scans its index)
+    in time order, and handed back in the configured zone"""
+    impl = db.DateTime
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if value.tzinfo is None:
+            value = local_zone().localize(value)
+        return value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return value.replace(tzinfo=datetime.timezone.utc).astimezone(local_zone())
 
 class Task(db.Model):
     __tablename__ = "tasks"
@@ -39,6 +121,8 @@ class Task(db.Model):
     parent_id = db.Column(db.Integer, db.ForeignKey("tasks.id"))
     children = db.relationship("Task", cascade="all, delete-orphan",back_populates="parent",order_by="Task.order")
     parent = db.relationship("Task", back_populates="children", remote_side=[id])
+    # materialized path of ancestor ids including this task, e.g. "/1/5/12/"; kept up to date by set_subtree_path()
+    path = db.Column(db.String(512), nullable=False, default="", index=True)
 
     completed = db.Column(db.Boolean, default=False)
     show_as_task = db.Column(db.Boolean, default=True)
@@ -48,7 +132,29 @@ class Task(db.Model):
     description = db.Column(db.String(2048), default="")
     tags = db.Column(db.String(512), default="")
     schedule = db.Column(db.String(512), default="")
-    due_date = db.Column(db.DateTime, default=datetime.datetime.now(TZ))
+    due_date = db.Column(ZonedDateTime, default=local_now, index=True)
+
+    # subtree rollups, kept up to date along the ancestor path by refresh_ancestor_rollups()
+    descendant_total = db.Column(db.Integer, nullable=False, default=0)
+    descendant_completed = db.Column(db.Integer, nullable=False, default=0)
+    next_due_date = db.Column(ZonedDateTime, nullable=True)
+
+    def get_path_ids(self):
+        """Return ids from the root down to this task"""
+        return [int(i) for i in self.path.split('/') if i]
+
+    def get_ancestors(self):
+        """Return ancestors from the root down (breadcrumb order) in a single query"""
+        ancestor_ids = self.get_path_ids()[:-1]
+        if not ancestor_ids:
+            return []
+        return sorted(
+            Task.query.filter(Task.id.in_(ancestor_ids)).all(),
+            key=lambda x: len(x.path))
+
+    def is_descendant_of(self, other):
+        """Return whether this task sits somewhere below other"""
+        return self.path != other.path and self.path.startswith(other.path)
 
     def get_tags(self):
         """Return list of tags"""
@@ -70,7 +176,7 @@ class Task(db.Model):
     def get_due_classes(self):
         classes = "due-wrapper "
         if self.show_date:
-            today = datetime.datetime.now(TZ).date()
+            today = local_now().date()
             if self.due_date.date() < today:
                 classes += "past-due "
             elif self.due_date.date() == today:
@@ -84,13 +190,31 @@ class Task(db.Model):
             classes += "hidden "
             return classes
 
+    def get_rollup_due(self):
+        """Return this task's own due date if it counts toward its ancestors' next due date"""
+        if self.show_as_task and self.show_date and not self.completed:
+            return self.due_date
+        return None
+
+    def get_rollup_display(self):
+        """Return subtree progress as a display string, e.g. '7/12, next due tue'"""
+        if not self.descendant_total:
+            return ""
+        display = f"{self.descendant_completed}/{self.descendant_total}"
+        if self.next_due_date:
+            display += f", next due {self.next_due_date.strftime('%a').lower()}"
+        return display
+
 class AppState(db.Model):
     __tablename__ = "app_state"
     
     id = db.Column(db.Integer, primary_key=True)
     show_completed = db.Column(db.Boolean, default=True)
     active_tags = db.Column(db.String(1024), default="")  # comma-separated list of active tags
-    last_checked_in = db.Column(db.DateTime, default=datetime.datetime.now(TZ))
+    last_checked_in = db.Column(ZonedDateTime, default=local_now)
+    version = db.Column(db.Integer, nullable=False, default=0)  # bumped by every commit that writes, see bump_version()
+    active_view_id = db.Column(db.Integer, db.ForeignKey("saved_views.id"), nullable=True)
+    active_view = db.relationship("SavedView")
     
     def get_active_tags(self):
         if not self.active_tags:
@@ -104,11 +228,369 @@ class AppState(db.Model):
         else:
             self.active_tags = tags_list
 
+class SavedView(db.Model):
+    __tablename__ = "saved_views"
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(128), nullable=False, default="")
+    tags = db.Column(db.String(512), default="")  # comma-separated list of tags
+    match_all = db.Column(db.Boolean, default=False)  # AND the tags together instead of OR
+    completed = db.Column(db.Boolean, nullable=True)  # None matches either state
+    due_within_days = db.Column(db.Integer, nullable=True)  # None means no due window
+    task_ids = db.Column(db.Text, default="")  # materialized comma-separated ids of matching tasks
+
+    def get_tags(self):
+        """Return list of tags"""
+        if not self.tags:
+            return []
+        return [tag.strip() for tag in self.tags.split(',') if tag.strip()]
+
+    def get_task_ids(self):
+        """Return the materialized matches as a set of ids"""
+        if not self.task_ids:
+            return set()
+        return {int(i) for i in self.task_ids.split(',') if i}
+
+    def set_task_ids(self, task_ids):
+        """Set the materialized matches from a set of ids"""
+        self.task_ids = ','.join(str(i) for i in sorted(task_ids))
+
+    def get_due_cutoff(self):
+        """Return the start of the first day past the due window, everything due before it is inside"""
+        return local_midnight(local_now().date() + datetime.timedelta(days=self.due_within_days + 1))
+
+    def matches(self, task):
+        """Return whether a single task satisfies this view"""
+        view_tags = self.get_tags()
+        if view_tags:
+            task_tags = task.get_tags()
+            if self.match_all and not all(tag in task_tags for tag in view_tags):
+                return False
+            if not self.match_all and not any(tag in task_tags for tag in view_tags):
+                return False
+
+        if self.completed is not None and bool(task.completed) != self.completed:
+            return False
+
+        if self.due_within_days is not None:
+            if not task.show_date:
+                return False
+            if task.due_date >= self.get_due_cutoff():
+                return False
+
+        return True
+
+@event.listens_for(Session, "do_orm_execute")
+def note_bulk_write(orm_execute_state):
+    """Bulk INSERT/UPDATE/DELETE statements skip the unit of work, so note them for bump_version() here"""
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info['wrote'] = True
+
+@event.listens_for(Session, "after_flush")
+def note_flushed_write(session, flush_context):
+    """Note unit of work writes as they're flushed. Autoflush empties new/dirty/deleted long before
+    commit, so by then there's nothing left to look at"""
+    if session.new or session.deleted or any(session.is_modified(obj) for obj in session.dirty):
+        session.info['wrote'] = True
+
+@event.listens_for(Session, "after_rollback")
+def forget_write(session):
+    session.info.pop('wrote', None)
+
+@event.listens_for(Session, "before_commit")
+def bump_version(session):
+    """Advance AppState.version whenever a commit writes anything, it stamps the ETag of the page"""
+    # commit only flushes after this hook, so flush here for anything still pending to be noted
+    session.flush()
+    if session.info.pop('wrote', False):
+        session.execute(db.update(AppState).values(version=AppState.version + 1))
+        session.info.pop('wrote', None)
+
+def get_state():
+    """Return the app state row, loading (or creating) it at most once per request"""
+    if "state" not in g:
+        state = AppState.query.first()
+        if not state:
+            # a fixed id makes a second worker racing to create the row fail instead of adding another
+            try:
+                state = AppState(id=1)
+                db.session.add(state)
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+                state = AppState.query.first()
+        g.state = state
+    return g.state
+
 def children(parent_id):
     return sorted(
             Task.query.filter_by(parent_id=parent_id).all(),
             key=lambda x: x.order)
 
+def subtree_filter(path):
+    """Condition matching the task at path and all of its descendants as an index range scan"""
+    # '0' sorts right after '/', so this range covers exactly the paths starting with path
+    return db.and_(Task.path >= path, Task.path < path[:-1] + "0")
+
+
+def set_subtree_path(task, parent):
+    """Re-root the materialized paths of a task and all its descendants under parent"""
+    old_path = task.path
+    new_path = f"{parent.path if parent else '/'}{task.id}/"
+    if old_path == new_path:
+        return
+
+    db.session.flush()
+    Task.query.filter(subtree_filter(old_path)).update(
+        {Task.path: db.literal(new_path).concat(db.func.substr(Task.path, len(old_path) + 1))},
+        synchronize_session="fetch")
+
+def set_rollup(task, task_children):
+    """Set a task's subtree counters from its direct children's counters"""
+    total = 0
+    completed = 0
+    due_dates = []
+    for child in task_children:
+        total += child.descendant_total
+        completed += child.descendant_completed
+        if child.show_as_task:
+            total += 1
+            if child.completed:
+                completed += 1
+        due_dates += [d for d in (child.get_rollup_due(), child.next_due_date) if d]
+
+    task.descendant_total = total
+    task.descendant_completed = completed
+    task.next_due_date = min(due_dates) if due_dates else None
+
+
+def refresh_ancestor_rollups(parent_id):
+    """Walk up the tree from parent_id, refreshing each ancestor's rollup. Returns the refreshed ancestors"""
+    if parent_id is None:
+        return []
+    parent = db.session.get(Task, parent_id)
+    if not parent:
+        return []
+
+    # deepest first, so every ancestor sees its children's fresh counters
+    ancestors = [parent] + parent.get_ancestors()[::-1]
+    for ancestor in ancestors:
+        set_rollup(ancestor, children(ancestor.id))
+    return ancestors
+
+
+def write_task_fields(batch):
+    """Apply a coalesced batch of {task_id: {field: value}} in a single transaction"""
+    for task_id, fields in batch.items():
+        task = db.session.get(Task, task_id)
+        if not task:
+            continue  # deleted while its edits were still buffered
+        for field, value in fields.items():
+            setattr(task, field, value)
+        if fields.keys() & {'completed', 'due_date'}:
+            refresh_ancestor_rollups(task.parent_id)
+        refresh_view_matches([task])
+    db.session.commit()
+
+
+def overlay_pending_writes(task):
+    """Show this process's buffered edits on a task loaded for a coalesced save. Never committed by the caller"""
+    for field, value in coalescer.get_pending(task.id).items():
+        setattr(task, field, value)
+
+
+build_hash = None
+
+def get_build_hash():
+    """Hash of the code, templates and static files this process serves, computed once.
+    Part of the page etag, so a deploy never leaves browsers on a cached page pointing at old assets"""
+    global build_hash
+    if build_hash is None:
+        digest = hashlib.md5()
+        paths = [os.path.abspath(__file__)]
+        for folder in (os.path.join(current_app.root_path, current_app.template_folder), current_app.static_folder):
+            for root, dirs, files in os.walk(folder):
+                dirs.sort()
+                paths += [os.path.join(root, name) for name in sorted(files)]
+        for path in paths:
+            digest.update(os.path.relpath(path, current_app.root_path).encode())
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        build_hash = digest.hexdigest()[:12]
+    return build_hash
+
+
+def page_etag():
+    """The main page only changes when something is written, the date (and so due colours, schedules)
+    moves on, or a deploy changes the code or assets"""
+    return f"{get_state().version}-{local_now().date().isoformat()}-{get_build_hash()}"
+
+
+def etag_matches(etag):
+    """Whether the client already holds etag, in any of the encodings compress_response() serves"""
+    return any(f"{etag}{suffix}" in request.if_none_match for suffix in ("", "-gzip", "-br"))
+
+
+def get_brotli():
+    """brotli is optional, fall back to gzip without it"""
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+asset_hashes = {}
+
+def asset_url(filename):
+    """Static url fingerprinted with the file's content hash, so it can be cached forever"""
+    if filename not in asset_hashes:
+        with open(os.path.join(current_app.static_folder, filename), 'rb') as f:
+            asset_hashes[filename] = hashlib.md5(f.read()).hexdigest()[:12]
+    return url_for('static', filename=filename, v=asset_hashes[filename])
+
+
+# saves that go through the coalescer instead of committing, every other request flushes it first
+COALESCED_ENDPOINTS = {
+    "todo.update_task_name",
+    "todo.update_task_description",
+    "todo.update_task_tags",
+    "todo.update_task_schedule",
+    "todo.update_task_due",
+}
+
+
+def render_rollups(ancestors):
+    """Render out-of-band swaps so ancestors' rollups update alongside a single-task fragment"""
+    return "".join(render_template("_rollup.html", task=ancestor, oob=True) for ancestor in ancestors)
+
+
+def rebuild_rollups(root=None):
+    """Recompute every task's rollup (or just those under root) bottom-up from a single query"""
+    by_parent = {}
+    for task in (load_subtree(root) if root else Task.query.all()):
+        by_parent.setdefault(task.parent_id, []).append(task)
+
+    def rebuild(task):
+        task_children = by_parent.get(task.id, [])
+        for child in task_children:
+            rebuild(child)
+        set_rollup(task, task_children)
+
+    for top in ([root] if root else by_parent.get(None, [])):
+        rebuild(top)
+
+
+def load_subtree(root):
+    """Load a task and everything under it in one query, filling in every children collection
+    from that result so rendering the subtree doesn't lazy load node by node"""
+    tasks = Task.query.filter(subtree_filter(root.path)).all()
+    by_parent = {}
+    for task in tasks:
+        by_parent.setdefault(task.parent_id, []).append(task)
+    for task in tasks:
+        set_committed_value(task, 'children', sorted(by_parent.get(task.id, []), key=lambda x: x.order))
+    return tasks
+
+
+def copy_subtree(source, new_parent, new_order, shift_days=0, reset_completed=False):
+    """Copy a task and its whole subtree under new_parent with set-based statements. Returns the copy's id.
+
+    Every id is shifted by the same offset, putting the copy's ids in one contiguous block right
+    after the current max id, so parent links inside the copy carry over and it keeps its order,
+    names, tags, schedules and dates.
+    """
+    tasks = Task.__table__
+    latest = tasks.alias("latest")
+    in_subtree = subtree_filter(source.path)
+    min_id, max_id = db.session.query(db.func.min(Task.id), db.func.max(Task.id)).filter(in_subtree).one()
+
+    # read inside the INSERT, so a concurrent insert can't claim the same ids in between
+    offset = db.select(db.func.max(latest.c.id) - min_id + 1).scalar_subquery()
+    is_root = tasks.c.id == source.id
+    # written in the same format ZonedDateTime binds, so the due date index keeps sorting in time order
+    shift = lambda column: db.func.strftime("%Y-%m-%d %H:%M:%f000", column, f"{shift_days:+d} days") if shift_days else column
+
+    copied = {
+        'id': tasks.c.id + offset,
+        'parent_id': db.case((is_root, db.literal(new_parent.id if new_parent else None, db.Integer)),
+                             else_=tasks.c.parent_id + offset),
+        'order': db.case((is_root, new_order), else_=tasks.c.order),
+        'completed': db.false() if reset_completed else tasks.c.completed,
+        'show_as_task': tasks.c.show_as_task,
+        'show_date': tasks.c.show_date,
+        'name': tasks.c.name,
+        'description': tasks.c.description,
+        'tags': tasks.c.tags,
+        'schedule': tasks.c.schedule,
+        'due_date': shift(tasks.c.due_date),
+        'descendant_total': tasks.c.descendant_total,
+        'descendant_completed': tasks.c.descendant_completed,
+        'next_due_date': shift(tasks.c.next_due_date),
+        'path': db.literal(""),
+    }
+    # sqlite reads the whole SELECT before inserting, so the copies never feed back into it
+    db.session.execute(db.insert(tasks).from_select(
+        list(copied), db.select(*copied.values()).where(in_subtree)))
+
+    # the INSERT holds the write lock, so the copy of max_id is still the newest row and gives back the offset
+    new_id = source.id + db.session.query(db.func.max(Task.id)).scalar() - max_id
+
+    # walk the copy from its root to give every row its materialized path
+    db.session.execute(db.text("""
+        WITH RECURSIVE paths(id, path) AS (
+            SELECT :new_id, :root_path
+            UNION ALL
+            SELECT tasks.id, paths.path || tasks.id || '/' FROM tasks JOIN paths ON tasks.parent_id = paths.id
+        )
+        UPDATE tasks SET path = (SELECT path FROM paths WHERE paths.id = tasks.id)
+        WHERE id IN (SELECT id FROM paths)
+    """), {'new_id': new_id, 'root_path': f"{new_parent.path if new_parent else '/'}{new_id}/"})
+
+    return new_id
+
+def refresh_view_matches(tasks):
+    """Add the given tasks to, or drop them from, every saved view's materialized matches"""
+    for view in SavedView.query.all():
+        task_ids = view.get_task_ids()
+        for task in tasks:
+            if view.matches(task):
+                task_ids.add(task.id)
+            else:
+                task_ids.discard(task.id)
+        view.set_task_ids(task_ids)
+
+
+def drop_view_matches(task_ids):
+    """Remove deleted tasks from every saved view's materialized matches"""
+    for view in SavedView.query.all():
+        view.set_task_ids(view.get_task_ids() - set(task_ids))
+
+
+def rebuild_view_matches(views=None):
+    """Recompute the materialized matches of the given (or every) saved view from scratch"""
+    if views is None:
+        views = SavedView.query.all()
+    if not views:
+        return
+    all_tasks = Task.query.all() if any(view.due_within_days is None for view in views) else []
+    for view in views:
+        candidates = all_tasks
+        if view.due_within_days is not None:
+            # only what's due inside the window can match, a range scan on the due date index
+            candidates = Task.query.filter(Task.show_date == True, Task.due_date < view.get_due_cutoff()).all()
+        view.set_task_ids({task.id for task in candidates if view.matches(task)})
+
+
+def get_saved_views():
+    return SavedView.query.order_by(SavedView.name).all()
+
+def render_subtree(task_id):
+    """Render a freshly written subtree as a single _task.html fragment"""
+    task = db.session.get(Task, task_id)
+    load_subtree(task)
+    return render_template("_task.html", task=task)
+
 def get_default_filters():
     return {
         'show_completed': True,
@@ -116,89 +598,111 @@ def get_default_filters():
     }
 
 def load_filters():
-    state = AppState.query.first()
-    if not state:
-        # Create default state
-        defaults = get_default_filters()
-        state = AppState(
-            show_completed=defaults['show_completed'],
-            active_tags=defaults['active_tags']
-        )
-        db.session.add(state)
-        db.session.commit()
+    state = get_state()
     
     return {
         'show_completed': state.show_completed,
-        'active_tags': state.get_active_tags()
+        'active_tags': state.get_active_tags(),
+        'active_view': state.active_view
     }
 
 
-def save_filters(show_completed=None, active_tags=None):
-    state = AppState.query.first()
-    if not state:
-        state = AppState()
-        db.session.add(state)
+def save_filters(show_completed=None, active_tags=None, active_view=False):
+    state = get_state()
     
     if show_completed is not None:
         state.show_completed = show_completed
     
     if active_tags is not None:
         state.set_active_tags(active_tags)
+
+    # None clears the active view, so False stands in for "leave it alone"
+    if active_view is not False:
+        state.active_view = active_view
     
     db.session.commit()
 
 
 def get_all_tags():
-    all_tasks = Task.query.all()
     tags = set()
-    for task in all_tasks:
-        tags.update(task.get_tags())
+    for (task_tags,) in db.session.query(Task.tags).distinct():
+        if task_tags:
+            tags.update(tag.strip() for tag in task_tags.split(',') if tag.strip())
     return sorted(list(tags))
 
 
 def apply_filters(tasks, filters):
     active_tags = filters.get('active_tags', [])
+    active_view = filters.get('active_view')
+
+    if not tasks:
+        return tasks
+
+    if active_view:
+        # a saved view's matches are already materialized, just look them up
+        query = Task.query.filter(Task.id.in_(active_view.get_task_ids()))
+    elif active_tags:
+        query = Task.query.filter(db.or_(*[Task.tags.contains(tag) for tag in active_tags]))
+    else:
+        return tasks
+
+    # every task passed in shares a parent, so one subtree range covers all their descendants
+    if tasks[0].parent_id is not None:
+        query = query.filter(subtree_filter(tasks[0].path[:-len(f"{tasks[0].id}/")]))
+
+    if active_view:
+        matches = query.all()
+    else:
+        # contains() over the comma-separated column is only a prefilter, match tags exactly here
+        matches = [task for task in query.all() if any(tag in active_tags for tag in task.get_tags())]
+
+    return topmost_matches(tasks, matches)
+
+
+def topmost_matches(tasks, matches):
+    """Return the matches found under tasks, minus those under another match, in tree order"""
+    task_ids = {task.id for task in tasks}
+    match_ids = {task.id for task in matches}
+
+    # keep the topmost matches only, a match under a matching ancestor comes along with it
+    filtered_tasks = []
+    for task in matches:
+        path_ids = task.get_path_ids()
+        top = next((i for i, path_id in enumerate(path_ids) if path_id in task_ids), None)
+        if top is None:
+            continue
+        if any(path_id in match_ids for path_id in path_ids[top:-1]):
+            continue
+        filtered_tasks.append((task, path_ids[top:]))
+
+    # restore tree (depth-first) order from the sibling order of everything along each path
+    orders = dict(db.session.query(Task.id, Task.order).filter(
+        Task.id.in_({path_id for _, path_ids in filtered_tasks for path_id in path_ids})).all())
+    filtered_tasks.sort(key=lambda x: [(orders[path_id], path_id) for path_id in x[1]])
     
-    # Only apply tag filtering
-    if active_tags:
-        def filter_by_tags(task, parent_matched=False):
-            task_tags = task.get_tags()
-            task_matches = any(tag in active_tags for tag in task_tags)
-            
-            if parent_matched or task_matches:
-                return task
-            else:
-                matching_children = []
-                for child in task.children:
-                    filtered = filter_by_tags(child, parent_matched=False)
-                    if filtered:
-                        matching_children.append(filtered)
-                
-                return matching_children if matching_children else None
-        
-        filtered_tasks = []
-        for task in tasks:
-            result = filter_by_tags(task, parent_matched=False)
-            if result:
-                if isinstance(result, list):
-                    filtered_tasks.extend(result)
-                else:
-                    filtered_tasks.append(result)
-        
-        return filtered_tasks
-    
-    return tasks
+    return [task for task, _ in filtered_tasks]
 
 def apply_scheduling(tasks):
-    state = AppState.query.first()
-    if not state:
-        state = AppState()
-        db.session.add(state)
-
-    last_checked_in = state.last_checked_in.strftime('%A').lower()
-    today = datetime.datetime.now(TZ).strftime('%A').lower()
+    state = get_state()
+
+    now = local_now()
+    start_of_today = local_midnight(now.date())
+    today = now.strftime('%A').lower()
+
+    if state.last_checked_in is None or state.last_checked_in < start_of_today:
+        # claim today's rollover with a compare-and-set so only one worker runs it. SQLite
+        # serializes the UPDATE, so a worker that loses the race waits for the winner to commit
+        claimed = db.session.execute(
+            db.update(AppState)
+            .where(AppState.id == state.id)
+            .where(db.or_(AppState.last_checked_in == None, AppState.last_checked_in < start_of_today))
+            .values(last_checked_in=now)
+        ).rowcount
+        if not claimed:
+            # someone else already rolled today over, pick up what they committed
+            db.session.commit()
+            return tasks
 
-    if last_checked_in != today:
         def uncomplete_scheduled(task):
             #(and vice versa)
             schedule = [t.strip() for t in task.schedule.lower().split(',') if t.strip() != ""]
@@ -216,8 +720,12 @@ def apply_scheduling(tasks):
         
         for task in tasks:
             uncomplete_scheduled(task)
-    
-    db.session.commit()
+
+        rebuild_rollups()
+        # due windows move with the calendar, so every view is stale on a new day
+        rebuild_view_matches()
+        db.session.commit()
+
     return tasks
 
 def displace_task(displacement,task_id,task_new_pos=None):
@@ -245,12 +753,18 @@ def displace_task(displacement,task_id,task_new_pos=None):
 def dent_task_to_parent(task_id, new_parent_id):
     task = Task.query.get_or_404(task_id)
     new_parent = Task.query.get_or_404(new_parent_id)
+
+    # A task can't be moved under itself or its own subtree
+    if new_parent.id == task.id or new_parent.is_descendant_of(task):
+        return
     
     # Get old siblings before changing parent
-    old_siblings = children(task.parent_id)
+    old_parent_id = task.parent_id
+    old_siblings = children(old_parent_id)
     
     # Change parent
     task.parent_id = new_parent_id
+    set_subtree_path(task, new_parent)
     
     # Get new siblings and add task at the beginning
     new_siblings = children(new_parent_id)
@@ -262,6 +776,9 @@ def dent_task_to_parent(task_id, new_parent_id):
     # Renumber new siblings (task is now first)
     for i, sibling in enumerate(new_siblings):
         sibling.order = i
+
+    refresh_ancestor_rollups(old_parent_id)
+    refresh_ancestor_rollups(new_parent_id)
     
     db.session.commit()
 
@@ -280,6 +797,7 @@ def dent_task(displacement, task_id):
         parent_start_position = next(i for i, t in enumerate(aunts_and_uncles) if t.id == task_at_hand.parent_id)
 
         task_at_hand.parent_id = parent_of_task.parent_id
+        set_subtree_path(task_at_hand, parent_of_task.parent)
 
         aunts_and_uncles.insert(parent_start_position + 1, task_at_hand)
 
@@ -291,6 +809,9 @@ def dent_task(displacement, task_id):
         for i, sibling in enumerate(old_siblings):
             sibling.order = i
 
+        # the new parent's subtree still contains the task, so refreshing from the old parent covers both
+        refresh_ancestor_rollups(parent_of_task.id)
+
         db.session.commit()
 
     elif displacement > 0:  # INDENT
@@ -306,6 +827,7 @@ def dent_task(displacement, task_id):
         new_siblings = children(new_parent.id)
 
         task_at_hand.parent_id = new_parent.id
+        set_subtree_path(task_at_hand, new_parent)
 
         new_siblings.insert(0, task_at_hand)
 
@@ -317,6 +839,9 @@ def dent_task(displacement, task_id):
         for i, sibling in enumerate(old_siblings):
             sibling.order = i
 
+        # the old parent's subtree still contains the task, so refreshing from the new parent covers both
+        refresh_ancestor_rollups(new_parent.id)
+
         db.session.commit()
 
 def get_correct_root_tasks():
@@ -325,54 +850,130 @@ def get_correct_root_tasks():
     root_tasks = apply_scheduling(root_tasks)
     return apply_filters(root_tasks, filters)
 
-@app.before_request
+@bp.before_app_request
+def flush_pending_writes():
+    """Read-your-writes: anything that renders from the database sees the buffered saves"""
+    if request.endpoint not in COALESCED_ENDPOINTS:
+        coalescer.flush()
+
+@bp.app_context_processor
+def inject_asset_url():
+    return {'asset_url': asset_url}
+
+@bp.after_app_request
+def cache_static(response):
+    """Fingerprinted static files never change under the same url"""
+    if request.endpoint == "static" and request.args.get('v') and response.status_code in (200, 304):
+        response.headers['Cache-Control'] = "public, max-age=31536000, immutable"
+    return response
+
+@bp.app_errorhandler(OperationalError)
+def database_locked(e):
+    """Waiting out another worker's write lock past the connection timeout is a 503 clients (and
+    loadtest.py) can tell apart by its header, any other database error stays a plain 500"""
+    if "database is locked" not in str(e) and "database table is locked" not in str(e):
+        raise e
+    return Response("database is locked, try again", status=503,
+                    headers={"Retry-After": "1", "X-Database-Locked": "true"})
+
+@bp.after_app_request
+def compress_response(response):
+    """gzip (or brotli when installed) text responses above COMPRESS_MIN_SIZE"""
+    if (response.status_code != 200
+            or 'Content-Encoding' in response.headers
+            or not (response.mimetype or "").startswith(("text/", "application/json", "application/javascript"))):
+        return response
+
+    if response.direct_passthrough:
+        if request.endpoint != "static":
+            return response
+        # static files are small, read them in so they can be compressed too
+        response.direct_passthrough = False
+
+    body = response.get_data()
+    if len(body) < current_app.config['COMPRESS_MIN_SIZE']:
+        return response
+
+    brotli = get_brotli()
+    if brotli and request.accept_encodings['br']:
+        response.set_data(brotli.compress(body, quality=5))
+        encoding = "br"
+    elif request.accept_encodings['gzip']:
+        response.set_data(gzip.compress(body, compresslevel=6))
+        encoding = "gzip"
+    else:
+        return response
+
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    # a strong etag names exact bytes, so each encoding needs its own
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f"{etag}-{encoding}")
+    return response
+
+@bp.before_app_request
 def require_login():
-    if request.endpoint not in ("login", "static"):
+    if request.endpoint not in ("todo.login", "static"):
         if not session.get("authenticated"):
             if request.headers.get("HX-Request"):
                 resp = Response("", status=200)
-                resp.headers["HX-Redirect"] = url_for("login")
+                resp.headers["HX-Redirect"] = url_for("todo.login")
                 return resp
-            return redirect(url_for("login"))
+            return redirect(url_for("todo.login"))
 
-@app.route('/')
+@bp.route('/')
 def base_view():
     try:
+        etag = page_etag()
+        if etag_matches(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+
         filters = load_filters()
         root_tasks = get_correct_root_tasks()
         all_tags = get_all_tags()
         
-        return render_template("todo.html", 
+        response = Response(render_template("todo.html", 
                              tasks=root_tasks, 
                              all_tags=all_tags,
-                             filters=filters)
+                             saved_views=get_saved_views(),
+                             filters=filters))
+        # rendering may have run the daily rollover, which is a write, so stamp with the version after it
+        response.set_etag(page_etag())
+        response.headers['Cache-Control'] = "private, no-cache"
+        return response
     except Exception as e:
         return f"there was an error with getting initial tasks: {e}"
 
 
-@app.route('/login', methods=["GET","POST"])
+@bp.route('/login', methods=["GET","POST"])
 def login():
     if request.method == "POST":
-        if check_password_hash(PASSWORD_HASH, request.form["password"]):
+        if check_password_hash(current_app.config['PASSWORD_HASH'], request.form["password"]):
             session["authenticated"] = True
-            return redirect(url_for("base_view"))
+            return redirect(url_for("todo.base_view"))
         else:
             return render_template("login.html", error="nope. try again")
     return render_template("login.html")
 
 
-@app.route('/logout')
+@bp.route('/logout')
 def logout():
     session.clear()
     return redirect("/login")
 
 
-@app.route("/create-first-task/<int:position>", methods=["POST"])
+@bp.route("/create-first-task/<int:position>", methods=["POST"])
 def create_first_task(position):
     # Create first root task
     how_many_other_roots = len(Task.query.filter_by(parent_id=None).all())
     new_task = Task(name="",order=how_many_other_roots)
     db.session.add(new_task)
+    db.session.flush()
+    new_task.path = f"/{new_task.id}/"
+    refresh_view_matches([new_task])
     db.session.commit()
     if position == 0:
         displace_task(None,new_task.id,0)
@@ -382,79 +983,133 @@ def create_first_task(position):
     return render_template("_task_list.html", tasks=root_tasks)
 
 
-@app.route("/create-subtask/<int:parent_id>", methods=["POST"])
+@bp.route("/create-subtask/<int:parent_id>", methods=["POST"])
 def create_subtask(parent_id):
     # Create new subtask
     how_many_siblings = len(Task.query.filter_by(parent_id=parent_id).all())
+    parent = Task.query.get_or_404(parent_id)
     new_task = Task(name="", parent_id=parent_id,order=how_many_siblings)
     db.session.add(new_task)
+    db.session.flush()
+    new_task.path = f"{parent.path}{new_task.id}/"
+    ancestors = refresh_ancestor_rollups(parent_id)
+    refresh_view_matches([new_task])
     db.session.commit()
     
-    return render_template("_task.html", task=new_task)
+    return render_template("_task.html", task=new_task) + render_rollups(ancestors)
+
+
+@bp.route("/duplicate-task/<int:task_id>", methods=["POST"])
+def duplicate_task(task_id):
+    """Copy a task and everything under it in place, right after the original"""
+    task = Task.query.get_or_404(task_id)
+
+    # make room among the siblings for the copy
+    Task.query.filter(Task.parent_id == task.parent_id, Task.order > task.order).update(
+        {Task.order: Task.order + 1}, synchronize_session="fetch")
+    new_id = copy_subtree(task, task.parent, task.order + 1)
 
+    new_task = db.session.get(Task, new_id)
+    ancestors = refresh_ancestor_rollups(new_task.parent_id)
+    refresh_view_matches(load_subtree(new_task))
+    db.session.commit()
+
+    return render_subtree(new_id) + render_rollups(ancestors)
+
+
+@bp.route("/instantiate-template/<int:task_id>", methods=["POST"])
+def instantiate_template(task_id):
+    """Start a fresh copy of a checklist: appended to the root list, nothing completed, and
+    due dates moved so the template's own due date lands on today"""
+    template = Task.query.get_or_404(task_id)
+
+    how_many_other_roots = Task.query.filter_by(parent_id=None).count()
+    shift_days = (local_now().date() - template.due_date.date()).days
+    new_id = copy_subtree(template, None, how_many_other_roots, shift_days=shift_days, reset_completed=True)
 
-@app.route("/toggle-task/<int:task_id>", methods=["POST"])
+    new_task = db.session.get(Task, new_id)
+    # nothing is completed any more, so the copied counters and next due dates need redoing
+    rebuild_rollups(new_task)
+    refresh_view_matches(load_subtree(new_task))
+    db.session.commit()
+
+    return render_subtree(new_id)
+
+
+@bp.route("/toggle-task/<int:task_id>", methods=["POST"])
 def toggle_task(task_id):
     task = Task.query.get_or_404(task_id)
     task.completed = not task.completed
+    ancestors = refresh_ancestor_rollups(task.parent_id)
+    refresh_view_matches([task])
     db.session.commit()
     
     # Return the updated task content
-    return render_template("_task_content.html", task=task)
+    return render_template("_task_content.html", task=task) + render_rollups(ancestors)
 
 
-@app.route("/update-task-name/<int:task_id>", methods=["POST"])
+@bp.route("/update-task-name/<int:task_id>", methods=["POST"])
 def update_task_name(task_id):
     task = Task.query.get_or_404(task_id)
     task.name = request.form.get('name', '')
-    db.session.commit()
+    coalescer.stage(task.id, name=task.name)
     
     return task.name
 
 
-@app.route("/update-task-description/<int:task_id>", methods=["POST"])
+@bp.route("/update-task-description/<int:task_id>", methods=["POST"])
 def update_task_description(task_id):
     task = Task.query.get_or_404(task_id)
     task.description = request.form.get('description', '')
-    db.session.commit()
+    coalescer.stage(task.id, description=task.description)
     
     return task.description
 
 
-@app.route("/update-task-tags/<int:task_id>", methods=["POST"])
+@bp.route("/update-task-tags/<int:task_id>", methods=["POST"])
 def update_task_tags(task_id):
     """Update task tags"""
     task = Task.query.get_or_404(task_id)
     tags_string = request.form.get('tags', '')
     task.set_tags(tags_string)
-    db.session.commit()
+    coalescer.stage(task.id, tags=task.tags)
     
     return task.get_tags_display()
 
-@app.route("/update-task-schedule/<int:task_id>",methods=["POST"])
+@bp.route("/update-task-schedule/<int:task_id>",methods=["POST"])
 def update_task_schedule(task_id):
     task = Task.query.get_or_404(task_id)
+    overlay_pending_writes(task)
+    was_completed = task.completed
     schedule_string = request.form.get('schedule','')
     task.schedule = schedule_string
 
-    state = AppState.query.first()
-    if not state:
-        state = AppState()
-        db.session.add(state)
-    
-    last_checked_in = state.last_checked_in.strftime('%A').lower()
-    today = datetime.datetime.now(TZ).strftime('%A').lower()
+    today = local_now().strftime('%A').lower()
 
     schedule = [t.strip() for t in task.schedule.lower().split(',') if t.strip() != ""]
     if len(schedule) > 0:
         if (not today in schedule) and (not 'daily' in schedule):
             task.completed = True
 
-    db.session.commit()
+    # only stage completed when the schedule flipped it, so this save never overwrites a toggle made meanwhile
+    if task.completed != was_completed:
+        coalescer.stage(task.id, schedule=task.schedule, completed=task.completed)
+    else:
+        coalescer.stage(task.id, schedule=task.schedule)
 
-    return render_template("_completed.html", task=task)
+    ancestors = []
+    if task.completed != was_completed:
+        # completing a task changes its ancestors' progress, so write through and show them fresh.
+        # the flush commits in its own session, so reload before reading the ancestors
+        coalescer.flush()
+        db.session.expire_all()
+        if task.parent_id is not None:
+            parent = db.session.get(Task, task.parent_id)
+            ancestors = [parent] + parent.get_ancestors()[::-1]
 
-@app.route("/refresh/<string:to_refresh>/<int:task_id>", methods=["POST"])
+    return render_template("_completed.html", task=task) + render_rollups(ancestors)
+
+@bp.route("/refresh/<string:to_refresh>/<int:task_id>", methods=["POST"])
 def refresh(to_refresh,task_id):
     time.sleep(0.5)
     task = Task.query.get_or_404(task_id)
@@ -464,7 +1119,7 @@ def refresh(to_refresh,task_id):
         return render_template("_completed.html", task=task)
 
 
-@app.route("/update-task-option/<string:option>/<int:task_id>", methods=["POST"])
+@bp.route("/update-task-option/<string:option>/<int:task_id>", methods=["POST"])
 def update_task_option(option,task_id):
     task = Task.query.get_or_404(task_id)
     if option == "show-date-toggle":
@@ -479,11 +1134,14 @@ def update_task_option(option,task_id):
             return_string = "[x] showing as task"
         else:
             return_string = "[ ] showing as list item"
+    # both toggles change what the ancestors count, so their labels come back out of band
+    ancestors = refresh_ancestor_rollups(task.parent_id)
+    refresh_view_matches([task])
     db.session.commit()
-    return return_string
+    return return_string + render_rollups(ancestors)
 
 
-@app.route("/move-task/<int:task_id>", methods=["POST"])
+@bp.route("/move-task/<int:task_id>", methods=["POST"])
 def move_task(task_id):
     displacement = int(request.form.get('displacement', ''))
     
@@ -520,7 +1178,7 @@ def move_task(task_id):
     root_tasks = get_correct_root_tasks()
     return render_template("_task_list.html", tasks=root_tasks)
 
-@app.route("/climb-task/<int:task_id>", methods=["POST"])
+@bp.route("/climb-task/<int:task_id>", methods=["POST"])
 def climb_task(task_id):
     displacement = int(request.form.get('displacement', ''))
     
@@ -571,65 +1229,53 @@ def climb_task(task_id):
     root_tasks = get_correct_root_tasks()
     return render_template("_task_list.html", tasks=root_tasks)
 
-@app.route("/update-task-due/<string:date_part>/<int:task_id>", methods=["POST"])
-def update_task_due(date_part,task_id):
-    task = Task.query.get_or_404(task_id)
-    if date_part == "day":
-        try:
-            task.due_date = task.due_date.replace(day=int(request.form.get('day','')))
-            db.session.commit()
-        except:
-            pass
-        return task.due_date.strftime('%d')
-
-    elif date_part == "month":
-        try:
-            task.due_date = task.due_date.replace(month=int(request.form.get('month','')))
-            db.session.commit()
-        except:
-            pass
-        return task.due_date.strftime('%m')
-
-    elif date_part == "year":
-        try:
-            task.due_date = task.due_date.replace(year=int(f"202{request.form.get('year','')}"))
-            db.session.commit()
-        except:
-            pass
-        return str(task.due_date.year)[-1]
-
-
-@app.route("/get-updated-date-warning/<int:task_id>/", methods=["POST"])
-def get_updated_date_warning(task_id):
+def parse_due_date(date_string, time_string, current):
+    """Return the local datetime for an ISO date (2026-10-19) and an optional time (09:30, or 09:30+05:00
+    for a time in another zone), keeping current's time of day when no time is given.
+    None if either doesn't parse or the year is out of range"""
+    try:
+        date = datetime.date.fromisoformat(date_string.strip())
+        if time_string.strip():
+            time_of_day = datetime.time.fromisoformat(time_string.strip())
+        else:
+            time_of_day = current.time() if current else datetime.time()
+    except ValueError:
+        return None
+    if not MIN_DUE_YEAR <= date.year <= MAX_DUE_YEAR:
+        return None
+    if time_of_day.tzinfo is not None:
+        # an offset pins down the exact moment, so move it into the configured zone rather than drop it
+        return datetime.datetime.combine(date, time_of_day).astimezone(local_zone())
+    return local_zone().localize(datetime.datetime.combine(date, time_of_day))
+
+@bp.route("/update-task-due/<int:task_id>", methods=["POST"])
+def update_task_due(task_id):
+    """Save a whole due date in one request. An invalid one leaves the date as it was"""
     task = Task.query.get_or_404(task_id)
-
-    other_classes = "due-wrapper "
-    if task.show_date:
-        today = datetime.datetime.now(TZ).date()
-        if task.due_date.date() < today:
-            other_classes += "past-due "
-        elif task.due_date.date() == today:
-            other_classes += "due-today "
-        elif task.due_date.date() == today + datetime.timedelta(days=1):
-            other_classes += "due-tomorrow "
-        elif (task.due_date.date() <= today + datetime.timedelta(days=7)):
-            other_classes += "due-this-week "
-        return other_classes
-    else:
-        other_classes += "hidden "
-        return other_classes
+    overlay_pending_writes(task)
+    due_date = parse_due_date(request.form.get('date', ''), request.form.get('time', ''), task.due_date)
+    if due_date is not None:
+        task.due_date = due_date
+        coalescer.stage(task.id, due_date=due_date)
+    # comes back with the due warning classes, so there's no follow up request for them
+    return render_template("_due_wrapper.html", task=task)
 
 
-@app.route("/delete-task/<int:task_id>", methods=["POST"])
+@bp.route("/delete-task/<int:task_id>", methods=["POST"])
 def delete_task(task_id):
     task = Task.query.get_or_404(task_id)
-    db.session.delete(task)
+    parent_id = task.parent_id
+    subtree_ids = [subtree_id for (subtree_id,) in db.session.query(Task.id).filter(subtree_filter(task.path))]
+    # remove the whole subtree in one statement instead of cascading node by node
+    Task.query.filter(subtree_filter(task.path)).delete(synchronize_session="fetch")
+    drop_view_matches(subtree_ids)
+    ancestors = refresh_ancestor_rollups(parent_id)
     db.session.commit()
 
-    return ""
+    return render_rollups(ancestors)
 
 
-@app.route("/set-filter/<filter_type>/<filter_value>", methods=["POST"])
+@bp.route("/set-filter/<filter_type>/<filter_value>", methods=["POST"])
 def set_filter(filter_type, filter_value):
     """Update filter state and return updated content"""
     filters = load_filters()
@@ -653,8 +1299,23 @@ def set_filter(filter_type, filter_value):
             # Add tag to filters
             active_tags.append(filter_value)
         
-        save_filters(active_tags=active_tags)
+        # picking tags by hand leaves any saved view
+        save_filters(active_tags=active_tags, active_view=None)
         filters['active_tags'] = active_tags
+        filters['active_view'] = None
+
+    elif filter_type == "view":
+        # Switch to a saved view, or back out of it if it's already active
+        try:
+            view_id = int(filter_value)
+        except ValueError:
+            abort(404)
+        view = SavedView.query.get_or_404(view_id)
+        if filters['active_view'] and filters['active_view'].id == view.id:
+            view = None
+        save_filters(active_tags=[], active_view=view)
+        filters['active_tags'] = []
+        filters['active_view'] = view
     
     # Return both tabs and task list
     root_tasks = get_correct_root_tasks()
@@ -668,10 +1329,59 @@ def set_filter(filter_type, filter_value):
     return render_template("_main_content.html", 
                          tasks=root_tasks, 
                          all_tags=all_tags,
+                         saved_views=get_saved_views(),
                          filters=filters)
 
 
-@app.route("/refresh-tabs", methods=["POST"])
+@bp.route("/save-view", methods=["POST"])
+def save_view():
+    """Save the current tag selection (plus optional match/completed/due options) as a named view"""
+    filters = load_filters()
+    name = request.form.get('name', '').strip()
+
+    if name:
+        completed = request.form.get('completed', '')
+        due_within_days = request.form.get('due_within_days', '')
+        view = SavedView(
+            name=name,
+            tags=','.join(filters['active_tags']),
+            match_all=request.form.get('match', 'any') == "all",
+            completed=None if completed == "" else completed.lower() == "true",
+            due_within_days=int(due_within_days) if due_within_days.isdigit() else None
+        )
+        db.session.add(view)
+        rebuild_view_matches([view])
+        save_filters(active_tags=[], active_view=view)
+        filters['active_tags'] = []
+        filters['active_view'] = view
+
+    root_tasks = get_correct_root_tasks()
+    return render_template("_main_content.html",
+                         tasks=root_tasks,
+                         all_tags=get_all_tags(),
+                         saved_views=get_saved_views(),
+                         filters=filters)
+
+
+@bp.route("/delete-view/<int:view_id>", methods=["POST"])
+def delete_view(view_id):
+    view = SavedView.query.get_or_404(view_id)
+    filters = load_filters()
+    if filters['active_view'] and filters['active_view'].id == view.id:
+        save_filters(active_view=None)
+        filters['active_view'] = None
+    db.session.delete(view)
+    db.session.commit()
+
+    root_tasks = get_correct_root_tasks()
+    return render_template("_main_content.html",
+                         tasks=root_tasks,
+                         all_tags=get_all_tags(),
+                         saved_views=get_saved_views(),
+                         filters=filters)
+
+
+@bp.route("/refresh-tabs", methods=["POST"])
 def refresh_tabs():
     """Return just the filter tabs (for after tag edits)"""
     filters = load_filters()
@@ -679,13 +1389,88 @@ def refresh_tabs():
     
     return render_template("_filter_tabs.html", 
                          all_tags=all_tags,
+                         saved_views=get_saved_views(),
                          filters=filters)
 
 
-with app.app_context():
+@bp.cli.command("init-db")
+def init_db_command():
+    """Create the tables for a brand new database and mark it as fully migrated"""
+    if db.inspect(db.engine).has_table(Task.__tablename__):
+        raise click.ClickException("database already exists, run `flask db upgrade` instead")
+    from flask_migrate import stamp
+
     db.create_all()
+    stamp()
+
+
+@bp.cli.command("rebuild-rollups")
+def rebuild_rollups_command():
+    """Recompute every task's subtree rollup (e.g. after upgrading an existing database)"""
+    rebuild_rollups()
+    db.session.commit()
+
+
+@bp.cli.command("snapshot")
+@click.option("--pages", type=int, default=None, help="pages copied per backup step")
+@click.option("--keep", type=int, default=None, help="how many snapshots to keep")
+@click.option("--verify", is_flag=True, help="restore the new snapshot to a scratch file and check it")
+def snapshot_command(pages, keep, verify):
+    """Take an online snapshot of the database while the app keeps serving"""
+    from snapshots import take_snapshot, verify_snapshot, format_stats
+
+    coalescer.flush()
+    stats = take_snapshot(
+        current_app.config['DATABASE_PATH'],
+        current_app.config['SNAPSHOT_DIR'],
+        pages=pages or current_app.config['SNAPSHOT_PAGES_PER_STEP'],
+        keep=keep if keep is not None else current_app.config['SNAPSHOT_KEEP'])
+    click.echo(format_stats(stats))
+    for path in stats['pruned']:
+        click.echo(f"pruned {path}")
+
+    if verify:
+        result = verify_snapshot(stats['path'])
+        click.echo(f"verify: integrity {result['integrity']}, rows {result['row_counts']}")
+        if not result['ok']:
+            raise click.ClickException("snapshot failed verification")
+
+
+@bp.cli.command("verify-snapshot")
+@click.argument("path", required=False)
+def verify_snapshot_command(path):
+    """Restore a snapshot (the newest by default) to a scratch file and check it"""
+    from snapshots import list_snapshots, verify_snapshot
+
+    if path is None:
+        snapshots = list_snapshots(current_app.config['SNAPSHOT_DIR'])
+        if not snapshots:
+            raise click.ClickException("no snapshots yet")
+        path = snapshots[-1]
+
+    result = verify_snapshot(path)
+    click.echo(f"{path}: integrity {result['integrity']}, rows {result['row_counts']}")
+    if not result['ok']:
+        raise click.ClickException("snapshot failed verification")
+
+
+@bp.cli.command("restore-snapshot")
+@click.argument("path")
+@click.argument("target")
+def restore_snapshot_command(path, target):
+    """Restore a snapshot into a new database file (point the app at it by hand)"""
+    from snapshots import restore_snapshot
+
+    try:
+        stats = restore_snapshot(path, target)
+    except FileExistsError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"restored {stats['pages_total']} pages to {target} in {stats['duration']:.3f}s")
+
 
 if __name__ == "__main__":
+    app = create_app()
     with app.app_context():
         db.create_all()
+    start_snapshot_thread(app)
     app.run(debug=True,host='0.0.0.0')
\ No newline at end of file
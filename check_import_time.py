@@ -0,0 +1,63 @@
+"""Cold start budget check, exits non-zero if importing an entry point gets too slow
+or starts pulling in something it shouldn't.
+
+    python check_import_time.py
+
+Each module is imported in a fresh interpreter under `python -X importtime`.
+"""
+import subprocess, sys
+
+# measured at ~600ms for wsgi (flask + flask_sqlalchemy are ~530ms of that) and ~10ms
+# for utilities, with headroom for slower machines
+BUDGETS_MS = {
+    "wsgi": 800,
+    "utilities": 50,
+}
+
+# modules that only tooling needs, and that serving should never pay for
+FORBIDDEN = {
+    "wsgi": ["alembic", "flask_migrate"],
+    "utilities": ["werkzeug", "flask"],
+}
+
+
+def measure(module):
+    """Return (total import ms, names of every module imported) for a cold import"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True)
+
+    total_us = 0
+    imported = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        if not cumulative_us.strip().isdigit():
+            continue  # the header line
+        imported.add(name.strip())
+        # top level imports are indented by a single space, nested ones by more
+        if not name.startswith("  "):
+            total_us += int(cumulative_us)
+
+    return total_us / 1000, imported
+
+
+def main():
+    failed = False
+    for module, budget_ms in BUDGETS_MS.items():
+        total_ms, imported = measure(module)
+        status = "ok" if total_ms <= budget_ms else "OVER BUDGET"
+        print(f"{module}: {total_ms:.0f}ms of {budget_ms}ms {status}")
+        failed |= total_ms > budget_ms
+
+        for forbidden in FORBIDDEN.get(module, []):
+            if forbidden in imported:
+                print(f"{module}: imports {forbidden}, which it shouldn't")
+                failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import atexit, threading
+
+
+class WriteCoalescer:
+    """Buffers per-task field updates for a short window and hands them over in one batch.
+
+    Rapid blur-driven saves on the same task (name, tags, the due date parts, ...) then cost
+    a single transaction instead of one commit each. Pending writes live in this process only:
+    call flush() before reading anything they could affect, and the app does exactly that
+    before every request that isn't itself a coalesced save.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.on_flush = None
+        self.window = 0
+        self.pending = {}  # task id -> {field: value}
+        self.lock = threading.Lock()  # guards pending and timer
+        self.flush_lock = threading.Lock()  # held for a whole flush, so readers wait for it to land
+        self.timer = None
+
+    def init_app(self, app, on_flush):
+        """on_flush(batch) gets {task_id: {field: value}} inside an app context and must commit"""
+        self.app = app
+        self.on_flush = on_flush
+        self.window = app.config.get('WRITE_COALESCE_SECONDS', 0)
+        atexit.register(self.flush)
+
+    def stage(self, task_id, **fields):
+        """Queue field updates for a task. Later values for the same field replace earlier ones"""
+        with self.lock:
+            self.pending.setdefault(task_id, {}).update(fields)
+            if self.window > 0 and self.timer is None:
+                self.timer = threading.Timer(self.window, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+        if self.window <= 0:
+            self.flush()
+
+    def get_pending(self, task_id):
+        """Return a copy of the updates still queued for a task"""
+        with self.lock:
+            return dict(self.pending.get(task_id, {}))
+
+    def flush(self):
+        """Write everything queued so far in one batch. Safe to call from any thread.
+        Also waits for a flush already running on another thread, so callers always read what it wrote"""
+        with self.flush_lock:
+            with self.lock:
+                batch, self.pending = self.pending, {}
+                if self.timer is not None:
+                    self.timer.cancel()
+                    self.timer = None
+
+            if not batch:
+                return
+
+            try:
+                with self.app.app_context():
+                    self.on_flush(batch)
+            except Exception:
+                # put the batch back underneath anything staged since, and try again later
+                with self.lock:
+                    for task_id, fields in batch.items():
+                        self.pending[task_id] = {**fields, **self.pending.get(task_id, {})}
+                    if self.window > 0 and self.timer is None:
+                        self.timer = threading.Timer(self.window, self.flush)
+                        self.timer.daemon = True
+                        self.timer.start()
+                raise
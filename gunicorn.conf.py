@@ -0,0 +1,32 @@
+import multiprocessing, os
+
+wsgi_app = "wsgi:app"
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+
+# import the app once in the master and fork the workers from it
+preload_app = True
+
+
+def post_fork(server, worker):
+    """Drop any pooled connections inherited from the master so every worker opens its own"""
+    from app import db, coalescer, start_snapshot_thread
+    from wsgi import app
+
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+    # every worker buffers saves on its own timer, so two saves of the same task on different
+    # workers could commit out of order and the older value would win. only coalesce with one worker
+    if server.cfg.workers > 1:
+        app.config['WRITE_COALESCE_SECONDS'] = coalescer.window = 0
+
+    # every worker runs the thread, claim files in the snapshot dir make sure only one copies per interval
+    start_snapshot_thread(app)
+
+
+def worker_exit(server, worker):
+    """Write out any buffered saves before the worker goes away"""
+    from app import coalescer
+
+    coalescer.flush()
@@ -0,0 +1,276 @@
+"""Concurrent htmx client load test against a running instance.
+
+    python loadtest.py --url http://127.0.0.1:8000 --password ... --clients 8 --duration 30
+    python loadtest.py --mix blur=6,toggle=2,move=1,render=1 --json results.json
+
+Every simulated client logs in through /login, builds a small task subtree of its own and
+then replays a weighted mix of the same requests the browser sends: blur saves, toggles,
+Ctrl+Arrow moves and full re-renders. Latency percentiles, throughput and errors (SQLite
+lock timeouts counted separately) are reported per route, as text and optionally JSON.
+"""
+import argparse, http.cookiejar, json, math, os, random, re, socket, sys, threading, time
+import urllib.error, urllib.parse, urllib.request
+
+# actions a client picks from, weighted by the mix
+MIXES = {
+    # editing: lots of blur saves with the odd toggle, move and re-render in between
+    "edit": {"blur": 6, "toggle": 2, "move": 1, "render": 1},
+    # browsing: mostly re-renders and filter switches
+    "browse": {"render": 4, "filter": 4, "toggle": 1, "blur": 1},
+    # reorganising: Ctrl+Arrow moves and indents with re-renders
+    "reorganise": {"move": 4, "climb": 3, "render": 2, "blur": 1},
+}
+
+TASK_ID = re.compile(r'id="task-item-(\d+)"')
+# the hide/show completed tab posts the opposite of the current setting
+COMPLETED_TOGGLE = re.compile(r'/set-filter/completed/(true|false)')
+# the app answers a lock timeout with a 503 carrying this header. base_view catches its own errors
+# and reports them with a 200, so for that one the body is checked as well
+LOCK_HEADER = "X-Database-Locked"
+LOCK_MARKERS = ("database is locked", "database table is locked")
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class Results:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}
+
+    def record(self, route, seconds, outcome):
+        with self.lock:
+            stats = self.routes.setdefault(route, {"latencies": [], "errors": 0, "lock_timeouts": 0, "timeouts": 0})
+            stats["latencies"].append(seconds)
+            if outcome == "lock_timeout":
+                stats["lock_timeouts"] += 1
+            elif outcome == "timeout":
+                stats["timeouts"] += 1
+            elif outcome != "ok":
+                stats["errors"] += 1
+
+    def summary(self, elapsed):
+        routes = {}
+        everything = []
+        for route, stats in sorted(self.routes.items()):
+            latencies = sorted(stats["latencies"])
+            everything += latencies
+            routes[route] = self.describe(latencies, elapsed, stats)
+        totals = {key: sum(stats[key] for stats in self.routes.values()) for key in ("errors", "lock_timeouts", "timeouts")}
+        return {"elapsed": elapsed, "total": self.describe(sorted(everything), elapsed, totals), "routes": routes}
+
+    @staticmethod
+    def describe(latencies, elapsed, stats):
+        ms = lambda seconds: None if seconds is None else round(seconds * 1000, 2)
+        return {
+            "requests": len(latencies),
+            "throughput": round(len(latencies) / elapsed, 2) if elapsed else 0,
+            "p50_ms": ms(percentile(latencies, 50)),
+            "p95_ms": ms(percentile(latencies, 95)),
+            "p99_ms": ms(percentile(latencies, 99)),
+            "max_ms": ms(latencies[-1] if latencies else None),
+            "errors": stats["errors"],
+            "lock_timeouts": stats["lock_timeouts"],
+            "timeouts": stats["timeouts"],
+        }
+
+
+class Client:
+    """One simulated browser tab: its own cookie jar and its own corner of the task tree"""
+
+    def __init__(self, base_url, password, results, timeout):
+        self.base_url = base_url.rstrip("/")
+        self.password = password
+        self.results = results
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+        self.task_ids = []
+        self.show_completed = None  # the list's setting before the run, put back by teardown()
+        self.tags = ["load", "test", f"client{id(self) % 1000}"]
+
+    def request(self, route, path, data=None, record=True):
+        """Send one request, timing it under route. Returns the body, or None on failure"""
+        body = urllib.parse.urlencode(data or {}).encode() if data is not None else None
+        req = urllib.request.Request(self.base_url + path, data=body)
+        if data is not None:
+            req.add_header("HX-Request", "true")
+
+        started = time.perf_counter()
+        outcome, text = "ok", None
+        try:
+            with self.opener.open(req, timeout=self.timeout) as response:
+                text = response.read().decode("utf-8", "replace")
+            # base_view reports its own errors with a 200
+            if any(marker in text for marker in LOCK_MARKERS):
+                outcome = "lock_timeout"
+        except urllib.error.HTTPError as e:
+            text = e.read().decode("utf-8", "replace")
+            outcome = "lock_timeout" if e.headers.get(LOCK_HEADER) else "error"
+        except (socket.timeout, TimeoutError):
+            outcome = "timeout"
+        except (urllib.error.URLError, ConnectionError):
+            outcome = "error"
+        elapsed = time.perf_counter() - started
+
+        if record:
+            self.results.record(route, elapsed, outcome)
+        return text if outcome == "ok" else None
+
+    def setup(self, tasks):
+        """Log in and create a root task with some subtasks to work on"""
+        if self.request("POST /login", "/login", {"password": self.password}) is None:
+            raise RuntimeError("login failed")
+
+        page = self.request("GET /", "/") or ""
+        toggle = COMPLETED_TOGGLE.search(page)
+        if toggle:
+            self.show_completed = toggle.group(1) == "false"
+        before = set(TASK_ID.findall(page))
+        after = set(TASK_ID.findall(self.request("POST /create-first-task/<n>", "/create-first-task/1", {}) or ""))
+        new = sorted(int(i) for i in after - before)
+        if not new:
+            raise RuntimeError("couldn't create a root task (is a saved view or tag filter active?)")
+        root = new[-1]
+        self.task_ids = [root]
+
+        for _ in range(tasks - 1):
+            html = self.request("POST /create-subtask/<id>", f"/create-subtask/{root}", {})
+            ids = TASK_ID.findall(html or "")
+            if ids:
+                self.task_ids.append(int(ids[0]))
+
+    def teardown(self):
+        """Delete every task setup() created and put back the completed filter the filter action flips.
+        The root takes its subtree with it, the rest covers subtasks a climb moved out from under it
+        (already deleted ones just 404)"""
+        for task_id in self.task_ids:
+            self.request("POST /delete-task/<id>", f"/delete-task/{task_id}", {}, record=False)
+        self.task_ids = []
+        if self.show_completed is not None:
+            value = "true" if self.show_completed else "false"
+            self.request("POST /set-filter/<type>/<value>", f"/set-filter/completed/{value}", {}, record=False)
+
+    def act(self, action):
+        task_id = random.choice(self.task_ids)
+        if action == "blur":
+            field = random.choice(["name", "description", "tags"])
+            value = ", ".join(random.sample(self.tags, 2)) if field == "tags" else f"{field} {random.randint(0, 9999)}"
+            self.request(f"POST /update-task-{field}/<id>", f"/update-task-{field}/{task_id}", {field: value})
+        elif action == "toggle":
+            self.request("POST /toggle-task/<id>", f"/toggle-task/{task_id}", {})
+        elif action == "move":
+            self.request("POST /move-task/<id>", f"/move-task/{task_id}", {"displacement": random.choice([-1, 1])})
+        elif action == "climb":
+            # never outdent the client's own root, that would wander into other clients' trees
+            if task_id != self.task_ids[0]:
+                self.request("POST /climb-task/<id>", f"/climb-task/{task_id}", {"displacement": random.choice([-1, 1])})
+        elif action == "render":
+            self.request("GET /", "/")
+        elif action == "filter":
+            self.request("POST /set-filter/<type>/<value>", f"/set-filter/completed/{random.choice(['true', 'false'])}", {})
+
+
+def parse_mix(mix):
+    if mix in MIXES:
+        return MIXES[mix]
+    weights = {}
+    for part in mix.split(","):
+        action, _, weight = part.partition("=")
+        weights[action.strip()] = float(weight or 1)
+    unknown = set(weights) - {"blur", "toggle", "move", "climb", "render", "filter"}
+    if unknown:
+        raise SystemExit(f"unknown actions in mix: {', '.join(sorted(unknown))}")
+    return weights
+
+
+def run(args):
+    weights = parse_mix(args.mix)
+    actions, cumulative = list(weights), list(weights.values())
+    setup_results, results = Results(), Results()
+
+    clients = []
+    try:
+        for _ in range(args.clients):
+            client = Client(args.url, args.password, setup_results, args.timeout)
+            clients.append(client)
+            client.setup(args.tasks)
+            client.results = results
+
+        deadline = time.perf_counter() + args.duration
+        barrier = threading.Barrier(len(clients))
+
+        def loop(client):
+            barrier.wait()
+            while time.perf_counter() < deadline:
+                client.act(random.choices(actions, weights=cumulative)[0])
+                if args.think:
+                    time.sleep(random.uniform(0, args.think))
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=loop, args=(client,)) for client in clients]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        # the target is usually someone's real list, so leave it as it was found, even if setup failed
+        for client in clients:
+            client.teardown()
+
+    summary = results.summary(elapsed)
+    summary["config"] = {"url": args.url, "clients": args.clients, "duration": args.duration,
+                         "mix": weights, "tasks_per_client": args.tasks, "think": args.think}
+    return summary
+
+
+def print_summary(summary):
+    header = f"{'route':<36} {'reqs':>6} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'err':>5} {'lock':>5} {'t/o':>5}"
+    print(header)
+    print("-" * len(header))
+    rows = list(summary["routes"].items()) + [("total", summary["total"])]
+    for route, stats in rows:
+        print(f"{route:<36} {stats['requests']:>6} {stats['throughput']:>8} {stats['p50_ms']:>8} "
+              f"{stats['p95_ms']:>8} {stats['p99_ms']:>8} {stats['errors']:>5} {stats['lock_timeouts']:>5} {stats['timeouts']:>5}")
+    print("(latencies in ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--password", default=os.environ.get("LOADTEST_PASSWORD"),
+                        help="login password (or set LOADTEST_PASSWORD)")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent simulated clients")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to run for")
+    parser.add_argument("--mix", default="edit",
+                        help=f"a preset ({', '.join(MIXES)}) or weights like blur=6,toggle=2,move=1,render=1")
+    parser.add_argument("--tasks", type=int, default=8, help="tasks each client creates to work on")
+    parser.add_argument("--think", type=float, default=0, help="max random pause between a client's requests, in seconds")
+    parser.add_argument("--timeout", type=float, default=30, help="per request timeout, in seconds")
+    parser.add_argument("--json", help="also write the results as JSON to this file ('-' for stdout)")
+    args = parser.parse_args()
+
+    if not args.password:
+        parser.error("a password is needed, pass --password or set LOADTEST_PASSWORD")
+
+    try:
+        summary = run(args)
+    except RuntimeError as e:
+        raise SystemExit(f"setup failed: {e}")
+    if args.json == "-":
+        json.dump(summary, sys.stdout, indent=2)
+        print()
+    else:
+        print_summary(summary)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
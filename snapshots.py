@@ -0,0 +1,162 @@
+import datetime, glob, os, sqlite3, threading, time
+
+SNAPSHOT_PATTERN = "backend-*.db"
+
+
+def copy_database(source_path, target_path, pages=128, sleep=0.005):
+    """Copy a live SQLite database with the online backup API, a few pages at a time.
+
+    Between steps the source is unlocked for `sleep` seconds, so the app keeps serving
+    reads and writes while the copy runs. Returns timing and paging stats.
+    """
+    steps = []
+
+    def progress(status, remaining, total):
+        steps.append((remaining, total))
+
+    started = time.perf_counter()
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target, pages=pages, progress=progress, sleep=sleep)
+    finally:
+        target.close()
+        source.close()
+    duration = time.perf_counter() - started
+
+    total = steps[-1][1] if steps else 0
+    return {
+        'duration': duration,
+        'pages_total': total,
+        'pages_per_step': pages,
+        'steps': len(steps),
+        # a write from another connection mid-copy makes sqlite start over, which shows as extra steps
+        'restarts': sum(1 for before, after in zip(steps, steps[1:]) if after[0] > before[0]),
+    }
+
+
+def take_snapshot(db_path, snapshot_dir, pages=128, keep=7):
+    """Write a consistent snapshot of db_path into snapshot_dir, then prune old ones.
+
+    The copy goes to a .partial file first and is renamed into place, so a crash
+    mid-copy never leaves a torn snapshot behind.
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    # down to the microsecond, so the CLI and the background thread can't pick the same name
+    # within a second and have os.replace() silently overwrite one snapshot with the other
+    name = datetime.datetime.now().strftime("backend-%Y%m%d-%H%M%S-%f.db")
+    path = os.path.join(snapshot_dir, name)
+    partial = path + ".partial"
+
+    stats = copy_database(db_path, partial, pages=pages)
+    os.replace(partial, path)
+
+    stats['path'] = path
+    stats['pruned'] = prune_snapshots(snapshot_dir, keep)
+    return stats
+
+
+def list_snapshots(snapshot_dir):
+    """Return snapshot paths, oldest first"""
+    return sorted(glob.glob(os.path.join(snapshot_dir, SNAPSHOT_PATTERN)))
+
+
+def prune_snapshots(snapshot_dir, keep):
+    """Delete all but the newest `keep` snapshots. Returns the deleted paths"""
+    snapshots = list_snapshots(snapshot_dir)
+    stale = snapshots[:-keep] if keep > 0 else []
+    for path in stale:
+        os.remove(path)
+    return stale
+
+
+def restore_snapshot(snapshot_path, target_path):
+    """Restore a snapshot into a brand new file, never over an existing one"""
+    if os.path.exists(target_path):
+        raise FileExistsError(f"{target_path} already exists, restore into a new file")
+    return copy_database(snapshot_path, target_path, pages=-1)
+
+
+def verify_snapshot(snapshot_path):
+    """Restore a snapshot to a scratch file and check that the result is a sound, complete database"""
+    scratch = snapshot_path + ".verify"
+    if os.path.exists(scratch):
+        os.remove(scratch)
+
+    try:
+        restore_snapshot(snapshot_path, scratch)
+        restored = sqlite3.connect(scratch)
+        original = sqlite3.connect(snapshot_path)
+        try:
+            integrity = restored.execute("PRAGMA integrity_check").fetchone()[0]
+            tables = [row[0] for row in original.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")]
+            row_counts = {}
+            for table in tables:
+                expected = original.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+                actual = restored.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+                row_counts[table] = (expected, actual)
+        finally:
+            restored.close()
+            original.close()
+    finally:
+        if os.path.exists(scratch):
+            os.remove(scratch)
+
+    return {
+        'ok': integrity == "ok" and all(expected == actual for expected, actual in row_counts.values()),
+        'integrity': integrity,
+        'row_counts': row_counts,
+    }
+
+
+def claim_slot(snapshot_dir, interval):
+    """Let exactly one process (out of several workers) take the snapshot for this interval"""
+    slot = int(time.time() // interval)
+    try:
+        os.close(os.open(os.path.join(snapshot_dir, f".claim-{slot}"), os.O_CREAT | os.O_EXCL))
+    except FileExistsError:
+        return False
+
+    for path in glob.glob(os.path.join(snapshot_dir, ".claim-*")):
+        if path != os.path.join(snapshot_dir, f".claim-{slot}"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+    return True
+
+
+class SnapshotThread(threading.Thread):
+    """Takes a snapshot every `interval` seconds in the background"""
+
+    def __init__(self, db_path, snapshot_dir, interval, pages=128, keep=7, logger=None):
+        super().__init__(daemon=True, name="snapshots")
+        self.db_path = db_path
+        self.snapshot_dir = snapshot_dir
+        self.interval = interval
+        self.pages = pages
+        self.keep = keep
+        self.logger = logger
+        self.stopped = threading.Event()
+
+    def run(self):
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        while not self.stopped.wait(self.interval):
+            if not claim_slot(self.snapshot_dir, self.interval):
+                continue
+            try:
+                stats = take_snapshot(self.db_path, self.snapshot_dir, pages=self.pages, keep=self.keep)
+                if self.logger:
+                    self.logger.info(format_stats(stats))
+            except Exception:
+                if self.logger:
+                    self.logger.exception("snapshot failed")
+
+    def stop(self):
+        self.stopped.set()
+
+
+def format_stats(stats):
+    return (f"snapshot {stats['path']}: {stats['pages_total']} pages in {stats['duration']:.3f}s, "
+            f"{stats['steps']} steps of {stats['pages_per_step']} pages, {stats['restarts']} restarts")
@@ -0,0 +1,35 @@
+import os, sys, types
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as todo
+
+PASSWORD = "test"
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """An app on a scratch database, with saves written straight through"""
+    config = types.ModuleType("config")
+    config.SECRET_KEY = "test"
+    config.PASSWORD_HASH = generate_password_hash(PASSWORD)
+    config.WRITE_COALESCE_SECONDS = 0
+    monkeypatch.setitem(sys.modules, "config", config)
+    monkeypatch.setattr(todo, "basedir", str(tmp_path))
+
+    app = todo.create_app(migrations=False)
+    with app.app_context():
+        todo.db.create_all()
+    yield app
+    with app.app_context():
+        todo.db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    client = app.test_client()
+    client.post("/login", data={"password": PASSWORD})
+    return client
@@ -0,0 +1,50 @@
+import pytest
+
+import app as todo
+
+
+def create_tasks(client, app):
+    """A root task with one subtask, returns (root id, child id)"""
+    client.post("/create-first-task/1")
+    with app.app_context():
+        root = todo.Task.query.filter_by(parent_id=None).one().id
+    client.post(f"/create-subtask/{root}")
+    with app.app_context():
+        child = todo.Task.query.filter_by(parent_id=root).one().id
+    return root, child
+
+
+MUTATIONS = {
+    "name": lambda c, root, child: c.post(f"/update-task-name/{root}", data={"name": "renamed"}),
+    "description": lambda c, root, child: c.post(f"/update-task-description/{root}", data={"description": "new"}),
+    "tags": lambda c, root, child: c.post(f"/update-task-tags/{child}", data={"tags": "a, b"}),
+    "toggle root": lambda c, root, child: c.post(f"/toggle-task/{root}"),
+    "toggle child": lambda c, root, child: c.post(f"/toggle-task/{child}"),
+    "show date": lambda c, root, child: c.post(f"/update-task-option/show-date-toggle/{child}"),
+    "due date": lambda c, root, child: c.post(f"/update-task-due/{child}", data={"date": "2031-01-02"}),
+    "create subtask": lambda c, root, child: c.post(f"/create-subtask/{root}"),
+    "create first task": lambda c, root, child: c.post("/create-first-task/1"),
+    "set filter": lambda c, root, child: c.post("/set-filter/completed/false"),
+    "delete": lambda c, root, child: c.post(f"/delete-task/{child}"),
+    "duplicate": lambda c, root, child: c.post(f"/duplicate-task/{root}"),
+}
+
+
+@pytest.mark.parametrize("mutation", MUTATIONS)
+def test_write_invalidates_page_etag(app, client, mutation):
+    root, child = create_tasks(client, app)
+    etag = client.get("/").headers["ETag"]
+    assert client.get("/", headers={"If-None-Match": etag}).status_code == 304
+
+    assert MUTATIONS[mutation](client, root, child).status_code == 200
+
+    response = client.get("/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_reads_keep_page_etag(app, client):
+    create_tasks(client, app)
+    etag = client.get("/").headers["ETag"]
+    assert client.get("/", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/", headers={"If-None-Match": etag}).status_code == 304
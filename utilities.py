@@ -1,4 +1,4 @@
-from werkzeug.security import generate_password_hash
-
 def hash_my_password(password):
+    # imported here so that importing this module stays free
+    from werkzeug.security import generate_password_hash
     print(generate_password_hash(password))
\ No newline at end of file
@@ -0,0 +1,4 @@
+from app import create_app
+
+# entry point for production servers, e.g. `gunicorn -c gunicorn.conf.py`
+app = create_app(migrations=False)